@@ -1,16 +1,45 @@
+import json
+import logging
+import orjson
 import os
 import sqlite3
 import requests
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from flask import Flask, render_template, jsonify, send_from_directory
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask.json.provider import JSONProvider
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+import httplib2
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from werkzeug.exceptions import NotFound
 
 load_dotenv()
 
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+# Every jsonify in the app (refresh, debug, errors) now encodes via
+# orjson, not just the hand-built /api/photos response
+app.json = ORJSONProvider(app)
+log = logging.getLogger(__name__)
+
+# When fronted by nginx/Apache with sendfile support, hand image bodies
+# to the web server (X-Sendfile header) instead of streaming them
+# through Python - the kernel then serves the file with zero copies
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 
 # Configuration
 GOOGLE_DRIVE_FOLDER_ID = os.getenv('GOOGLE_DRIVE_FOLDER_ID', '1EGGGv1mw0Wd2SLlwU14Em6-W-sob7YjO')
@@ -18,22 +47,106 @@ GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 DB_PATH = 'photos.db'
 CACHE_DIR = 'cached_images'
 CACHE_DURATION_MINUTES = 10  # Refresh from Drive API after this many minutes
+DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '16'))  # Concurrent image downloads
 
 # Create cache directory if it doesn't exist
 Path(CACHE_DIR).mkdir(exist_ok=True)
 
+def _scan_cache_dir():
+    """List cached file IDs, sweeping stale .tmp files from crashed downloads.
+
+    A leftover <id>.tmp would otherwise block every future 'xb' claim for
+    that file ID, making the photo impossible to cache again.
+    """
+    ids = set()
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.tmp'):
+            try:
+                os.unlink(os.path.join(CACHE_DIR, name))
+                log.warning("Removed stale temp file from interrupted download: %s", name)
+            except OSError:
+                pass
+        else:
+            ids.add(name)
+    return ids
+
+# File IDs already on disk, so existence checks on the image-serving hot
+# path are a set lookup instead of a stat() syscall
+_cached_ids = _scan_cache_dir()
+_cached_ids_lock = threading.Lock()
+
+# Shared Drive API client - build() parses the discovery document, which
+# is far too expensive to repeat on every refresh
+_drive_service = None
+_drive_service_lock = threading.Lock()
+
+def get_drive_service():
+    """Return the shared Drive API client, building it on first use"""
+    global _drive_service
+    with _drive_service_lock:
+        if _drive_service is None:
+            # static_discovery uses the bundled discovery document, so no
+            # network round trip is needed to construct the client
+            _drive_service = build('drive', 'v3',
+                                   developerKey=GOOGLE_API_KEY,
+                                   cache_discovery=False,
+                                   static_discovery=True)
+        return _drive_service
+
+# Shared HTTP session so downloads reuse pooled connections to the Drive
+# hosts instead of paying a TCP/TLS handshake per image
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504])
+))
+
+# One SQLite connection per thread, created lazily and kept for the life
+# of the process - avoids the file-open/schema-parse cost of
+# sqlite3.connect() on every request
+_tls = threading.local()
+
+def get_conn():
+    """Return this thread's cached SQLite connection, creating it on first use"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        # journal_mode=WAL persists in the database file, but these are
+        # per-connection settings and must be applied to each one
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA cache_size=-20000')
+        _tls.conn = conn
+    return conn
+
 def init_db():
     """Initialize the SQLite database"""
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
+    # WAL lets api_photos reads run alongside the refresh writer, and
+    # synchronous=NORMAL halves fsyncs (fine for a rebuildable cache)
+    c.execute('PRAGMA journal_mode=WAL')
+    c.execute('PRAGMA synchronous=NORMAL')
+    c.execute('PRAGMA temp_store=MEMORY')
+    c.execute('PRAGMA mmap_size=268435456')
+    c.execute('PRAGMA cache_size=-20000')
     c.execute('''
         CREATE TABLE IF NOT EXISTS photos (
             id TEXT PRIMARY KEY,
             name TEXT,
-            url TEXT,
+            ord INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # Databases created before the ord column existed: add it in place
+    # (the cache is fully rewritten on the next refresh anyway)
+    try:
+        c.execute('ALTER TABLE photos ADD COLUMN ord INTEGER')
+    except sqlite3.OperationalError:
+        pass
     c.execute('''
         CREATE TABLE IF NOT EXISTS cache_info (
             key TEXT PRIMARY KEY,
@@ -43,207 +156,273 @@ def init_db():
     conn.commit()
     conn.close()
 
-def should_refresh_cache():
-    """Check if cache is older than CACHE_DURATION_MINUTES"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+# Full photo list, mirrored in memory so the hot path skips SQLite and
+# dict re-construction entirely between refreshes. The serialized form is
+# kept alongside it so /api/photos doesn't re-encode an unchanged list.
+_photos_cache = None
+_photos_json = None
+_photos_lock = threading.Lock()
+
+# Last/next refresh times, mirrored in memory so the hot path never has
+# to ask SQLite (or redo datetime arithmetic) for answers that change
+# once per CACHE_DURATION_MINUTES
+_refresh_state = {'ts': None, 'next_refresh': None}
+_refresh_state_lock = threading.Lock()
+
+def _set_refresh_time(ts):
+    """Record a refresh time and precompute the matching next-refresh time"""
+    with _refresh_state_lock:
+        _refresh_state['ts'] = ts
+        _refresh_state['next_refresh'] = ts + timedelta(minutes=CACHE_DURATION_MINUTES)
+
+def _last_refresh_time():
+    """Return the last refresh time, loading it from the DB on cold start"""
+    with _refresh_state_lock:
+        if _refresh_state['ts'] is not None:
+            return _refresh_state['ts']
+    c = get_conn().cursor()
     c.execute('SELECT last_updated FROM cache_info WHERE key = ?', ('photos',))
     result = c.fetchone()
-    conn.close()
-    
     if not result:
+        return None
+    ts = datetime.fromisoformat(result[0])
+    _set_refresh_time(ts)
+    return ts
+
+def should_refresh_cache():
+    """Check if cache is older than CACHE_DURATION_MINUTES"""
+    last_updated = _last_refresh_time()
+    if last_updated is None:
         return True
-    
-    last_updated = datetime.fromisoformat(result[0])
     return datetime.now() - last_updated > timedelta(minutes=CACHE_DURATION_MINUTES)
 
 def save_photos_to_db(photos):
     """Save photos to SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Clear existing photos
-    c.execute('DELETE FROM photos')
-    
-    # Insert new photos
-    for photo in photos:
-        c.execute('INSERT INTO photos (id, name, url) VALUES (?, ?, ?)',
-                  (photo['id'], photo['name'], photo['url']))
-    
-    # Update cache timestamp
-    c.execute('INSERT OR REPLACE INTO cache_info (key, last_updated) VALUES (?, ?)',
-              ('photos', datetime.now().isoformat()))
-    
-    conn.commit()
-    conn.close()
+    global _photos_cache, _photos_json
+    conn = get_conn()
+    now = datetime.now()
+
+    # Steady-state refreshes of an unchanged folder are the common case:
+    # just bump the timestamp and leave the table and caches alone
+    with _photos_lock:
+        unchanged = _photos_cache is not None and photos == _photos_cache
+    if unchanged:
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO cache_info (key, last_updated) VALUES (?, ?)',
+                         ('photos', now.isoformat()))
+        _set_refresh_time(now)
+        log.debug("Photo list unchanged, timestamp refreshed only")
+        return
+
+    # One transaction for the whole refresh: upsert every photo, drop the
+    # ones that disappeared from Drive, stamp. Upserting instead of
+    # truncate-and-reload keeps unchanged btree pages hot across refreshes.
+    with conn:
+        conn.executemany('''
+            INSERT INTO photos (id, name, ord) VALUES (?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name, ord = excluded.ord
+        ''', ((photo['id'], photo['name'], ord_)
+              for ord_, photo in enumerate(photos)))
+        conn.execute('DELETE FROM photos WHERE id NOT IN (SELECT value FROM json_each(?))',
+                     (json.dumps([photo['id'] for photo in photos]),))
+        conn.execute('INSERT OR REPLACE INTO cache_info (key, last_updated) VALUES (?, ?)',
+                     ('photos', now.isoformat()))
+
+    _set_refresh_time(now)
+
+    with _photos_lock:
+        _photos_cache = list(photos)
+        _photos_json = orjson.dumps(_photos_cache)
 
 def get_photos_from_db():
     """Get photos from SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT id, name, url FROM photos ORDER BY name')
+    c = get_conn().cursor()
+    # Drive already returns files sorted by name (orderBy='name'), so the
+    # stored insertion order is the display order - no sort step needed.
+    # The url is always derived from the id, so it isn't stored at all.
+    c.execute('SELECT id, name FROM photos ORDER BY ord')
     rows = c.fetchall()
-    conn.close()
-    
-    return [{'id': row[0], 'name': row[1], 'url': row[2]} for row in rows]
+
+    return [{'id': row[0], 'name': row[1], 'url': f"/images/{row[0]}"} for row in rows]
+
+# Candidate URL formats for fetching a Drive file, in default order
+URL_TEMPLATES = [
+    "https://drive.google.com/uc?export=download&id={id}",
+    "https://lh3.googleusercontent.com/d/{id}",
+    "https://drive.google.com/thumbnail?id={id}&sz=w2000"
+]
+
+# Which template succeeded last - almost always the same for every file
+# in a folder, so trying it first avoids the fallback timeouts
+_winning_url_template = None
+_winning_url_lock = threading.Lock()
 
 def download_image(file_id, file_name):
     """Download an image from Google Drive and cache it locally"""
+    global _winning_url_template
     cache_path = os.path.join(CACHE_DIR, file_id)
-    
-    # Skip if already cached
-    if os.path.exists(cache_path):
-        print(f"⏭ Skipped (already cached): {file_name}")
+
+    # Skip if already cached - set membership first, stat only on a miss
+    with _cached_ids_lock:
+        cached = file_id in _cached_ids
+    if cached or os.path.exists(cache_path):
+        log.debug("Skipped (already cached): %s", file_name)
         return cache_path
-    
-    # Try multiple URL formats to download the image
-    urls_to_try = [
-        f"https://drive.google.com/uc?export=download&id={file_id}",
-        f"https://lh3.googleusercontent.com/d/{file_id}",
-        f"https://drive.google.com/thumbnail?id={file_id}&sz=w2000"
-    ]
-    
-    for url in urls_to_try:
+
+    # Try multiple URL formats, starting with the last known winner
+    templates = list(URL_TEMPLATES)
+    with _winning_url_lock:
+        winner = _winning_url_template
+    if winner in templates:
+        templates.remove(winner)
+        templates.insert(0, winner)
+
+    # Download to a temp file and os.replace() into place so a crash or
+    # disk-full mid-write can never leave a truncated image in the cache
+    tmp_path = cache_path + '.tmp'
+    for template in templates:
+        url = template.format(id=file_id)
         try:
-            response = requests.get(url, timeout=30, allow_redirects=True)
-            if response.status_code == 200 and len(response.content) > 0:
-                # Save the image
-                with open(cache_path, 'wb') as f:
-                    f.write(response.content)
-                print(f"✓ Downloaded: {file_name}")
-                return cache_path
+            with SESSION.get(url, timeout=30, allow_redirects=True, stream=True) as response:
+                if response.status_code != 200:
+                    continue
+                # 'xb' atomically claims the temp file, so two pool
+                # workers can never stream into the same download
+                f = open(tmp_path, 'xb')
+                try:
+                    # Stream to disk in 64KB chunks so memory stays
+                    # bounded no matter how large the image is
+                    bytes_written = 0
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
+                        bytes_written += len(chunk)
+                    f.close()
+                    if bytes_written > 0:
+                        os.replace(tmp_path, cache_path)
+                        with _cached_ids_lock:
+                            _cached_ids.add(file_id)
+                        with _winning_url_lock:
+                            _winning_url_template = template
+                        log.info("Downloaded: %s", file_name)
+                        return cache_path
+                finally:
+                    if not f.closed:
+                        f.close()
+                    # We own the temp file here; drop it unless it was
+                    # already renamed into place
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
+        except FileExistsError:
+            log.debug("Download already claimed by another worker: %s", file_name)
+            return None
         except Exception as e:
-            print(f"Failed to download from {url}: {e}")
+            log.warning("Failed to download from %s: %s", url, e)
             continue
     
-    print(f"✗ Could not download {file_name} from any URL")
+    log.error("Could not download %s from any URL", file_name)
     return None
 
+# Long-lived download pool shared by all refreshes - worker threads are
+# created once instead of per batch
+_download_pool = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS,
+                                    thread_name_prefix='download')
+
 def download_images_async(files_to_download):
-    """Download multiple images asynchronously in the background"""
-    def download_worker():
-        for file_id, file_name in files_to_download:
-            # Double-check file doesn't exist (might have been downloaded by another process)
-            cache_path = os.path.join(CACHE_DIR, file_id)
-            if not os.path.exists(cache_path):
-                download_image(file_id, file_name)
-            else:
-                print(f"⏭ Skipped (already exists): {file_name}")
-    
-    # Start download in background thread
-    thread = threading.Thread(target=download_worker, daemon=True)
-    thread.start()
-    print(f"⏬ Started background download of {len(files_to_download)} images")
-
-def fetch_photos_from_drive():
-    """Fetch all image files from the public Google Drive folder"""
-    print("\n=== FETCH PHOTOS FROM DRIVE ===")
+    """Queue images for download on the shared thread pool"""
+    for file_id, file_name in files_to_download:
+        _download_pool.submit(download_image, file_id, file_name)
+    log.info("Queued background download of %d images", len(files_to_download))
+
+def _iter_drive_pages(service, query, http):
+    """Yield raw Drive list API responses, one page at a time"""
+    page_token = None
+    page = 0
+    while True:
+        page += 1
+        request = service.files().list(
+            q=query,
+            fields="nextPageToken, files(id, name)",
+            orderBy='name',
+            pageSize=1000,
+            pageToken=page_token
+        )
+        try:
+            results = request.execute(http=http)
+        except HttpError as http_err:
+            # Google-specific HTTP error (401, 403, 404, …)
+            log.error("HTTP ERROR on page %d: %s - %s",
+                      page, http_err.resp.status, http_err.content.decode())
+            return
+        except Exception:
+            log.exception("Exception on page %d", page)
+            return
+
+        log.debug("Page %d returned %d files", page, len(results.get('files', [])))
+        yield results
+
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return
+
+def fetch_photos_from_drive(return_raw=False):
+    """Fetch all image files from the public Google Drive folder.
+
+    With return_raw=True, also return the raw first-page API response
+    (for the debug endpoint) as a (photos, raw) tuple.
+    """
+    log.info("=== FETCH PHOTOS FROM DRIVE ===")
+    raw_first_page = None
     try:
         # ------------------------------------------------------------------
         # 1. BASIC SANITY CHECKS
         # ------------------------------------------------------------------
         if not GOOGLE_API_KEY:
-            print("ERROR: GOOGLE_API_KEY not set in .env file!")
-            return []
+            log.error("GOOGLE_API_KEY not set in .env file!")
+            return ([], raw_first_page) if return_raw else []
         if not GOOGLE_DRIVE_FOLDER_ID:
-            print("ERROR: GOOGLE_DRIVE_FOLDER_ID not set!")
-            return []
-
-        print(f"Using API key: {GOOGLE_API_KEY[:8]}…")
-        print(f"Folder ID      : {GOOGLE_DRIVE_FOLDER_ID}")
-
-        # ------------------------------------------------------------------
-        # 2. BUILD THE SERVICE (with a tiny timeout so we fail fast)
-        # ------------------------------------------------------------------
-        from googleapiclient.discovery import build
-        from googleapiclient.errors import HttpError
-        import httplib2
+            log.error("GOOGLE_DRIVE_FOLDER_ID not set!")
+            return ([], raw_first_page) if return_raw else []
 
-        service = build('drive', 'v3',
-                        developerKey=GOOGLE_API_KEY,
-                        cache_discovery=False)   # avoid stale discovery cache
+        log.debug("Using API key: %s…", GOOGLE_API_KEY[:8])
+        log.debug("Folder ID: %s", GOOGLE_DRIVE_FOLDER_ID)
 
         # ------------------------------------------------------------------
-        # 3. FIRST PAGE – we also capture the raw response for debugging
+        # 2. PAGINATED LIST - one shared Http object so the TLS connection
+        #    to googleapis.com is reused across pages
         # ------------------------------------------------------------------
+        service = get_drive_service()
         query = f"'{GOOGLE_DRIVE_FOLDER_ID}' in parents and mimeType contains 'image/'"
-        print(f"Query          : {query}")
-
-        request = service.files().list(
-            q=query,
-            fields="nextPageToken, files(id, name, mimeType, thumbnailLink, webViewLink)",
-            orderBy='name',
-            pageSize=1000
-        )
-
-        # Execute the request inside a try/except that prints *everything*
-        try:
-            results = request.execute(http=httplib2.Http(timeout=30))
-        except HttpError as http_err:
-            # Google-specific HTTP error (401, 403, 404, …)
-            print(f"HTTP ERROR {http_err.resp.status} from Drive API:")
-            print(http_err.content.decode())
-            return []
-        except Exception as exc:
-            print(f"UNEXPECTED EXCEPTION while calling Drive API:")
-            import traceback
-            traceback.print_exc()
-            return []
+        log.debug("Query: %s", query)
 
-        files = results.get('files', [])
-        print(f"First page returned {len(files)} files")
-        print(f"Raw first-page keys: {list(results.keys())}")
+        http = httplib2.Http(timeout=30)
+        files = []
+        for results in _iter_drive_pages(service, query, http):
+            if raw_first_page is None:
+                raw_first_page = results
+            files.extend(results.get('files', []))
 
         # ------------------------------------------------------------------
-        # 4. PAGINATION LOOP (with the same detailed logging)
+        # 3. FINAL SUMMARY
         # ------------------------------------------------------------------
-        page_token = results.get('nextPageToken')
-        page = 1
-        while page_token:
-            page += 1
-            print(f"Fetching page {page} (token={page_token[:20]}…)")
-            request = service.files().list(
-                q=query,
-                fields="nextPageToken, files(id, name, mimeType, thumbnailLink, webViewLink)",
-                orderBy='name',
-                pageSize=1000,
-                pageToken=page_token
-            )
-            try:
-                results = request.execute(http=httplib2.Http(timeout=30))
-            except HttpError as http_err:
-                print(f"HTTP ERROR on page {page}: {http_err.resp.status}")
-                print(http_err.content.decode())
-                break
-            except Exception as exc:
-                print(f"Exception on page {page}:")
-                import traceback
-                traceback.print_exc()
-                break
-
-            page_files = results.get('files', [])
-            files.extend(page_files)
-            print(f"Page {page} added {len(page_files)} files (total now {len(files)})")
-            page_token = results.get('nextPageToken')
-
-        # ------------------------------------------------------------------
-        # 5. FINAL SUMMARY
-        # ------------------------------------------------------------------
-        print(f"TOTAL files retrieved from Drive: {len(files)}")
+        log.info("TOTAL files retrieved from Drive: %d", len(files))
         if not files:
-            print("WARNING: No files matched the query – check folder ID, sharing, and MIME filter.")
-            return []
+            log.warning("No files matched the query – check folder ID, sharing, and MIME filter.")
+            return ([], raw_first_page) if return_raw else []
 
         # ------------------------------------------------------------------
-        # 6. BUILD PHOTO LIST + schedule missing downloads
+        # 4. BUILD PHOTO LIST + schedule missing downloads
         # ------------------------------------------------------------------
         photo_urls = []
         files_to_download = []
 
+        # One snapshot of the cache contents instead of a stat() per file
+        with _cached_ids_lock:
+            cached_ids = set(_cached_ids)
+
         for file in files:
             file_id   = file['id']
             file_name = file.get('name', '(no name)')
-            cache_path = os.path.join(CACHE_DIR, file_id)
 
             photo_urls.append({
                 'id'   : file_id,
@@ -251,23 +430,21 @@ def fetch_photos_from_drive():
                 'url'  : f"/images/{file_id}"
             })
 
-            if not os.path.exists(cache_path):
+            if file_id not in cached_ids:
                 files_to_download.append((file_id, file_name))
 
         if files_to_download:
-            print(f"{len(files_to_download)} images are missing locally – starting async download")
+            log.info("%d images are missing locally – starting async download", len(files_to_download))
             download_images_async(files_to_download)
         else:
-            print("All images already cached locally")
+            log.info("All images already cached locally")
 
-        print("=== FETCH COMPLETE ===\n")
-        return photo_urls
+        log.info("=== FETCH COMPLETE ===")
+        return (photo_urls, raw_first_page) if return_raw else photo_urls
 
-    except Exception as e:
-        print("FATAL ERROR in fetch_photos_from_drive():")
-        import traceback, sys
-        traceback.print_exc(file=sys.stdout)
-        return []
+    except Exception:
+        log.exception("FATAL ERROR in fetch_photos_from_drive()")
+        return ([], raw_first_page) if return_raw else []
 
 @app.route('/')
 def index():
@@ -277,73 +454,105 @@ def index():
 @app.route('/images/<file_id>')
 def serve_image(file_id):
     """Serve a cached image, or return placeholder if not yet downloaded"""
-    cache_path = os.path.join(CACHE_DIR, file_id)
-    
-    if os.path.exists(cache_path):
-        return send_from_directory(CACHE_DIR, file_id)
-    else:
-        # Return a simple placeholder response
-        # The image is being downloaded in the background
+    # EAFP: send_from_directory stats the file anyway, so a separate
+    # existence check would just double the syscalls
+    try:
+        # Drive file IDs are immutable, so the content never changes:
+        # let browsers cache aggressively and answer revisits with 304s
+        response = send_from_directory(CACHE_DIR, file_id, conditional=True,
+                                       max_age=31536000)
+    except NotFound:
+        # The image is still being downloaded in the background
         from flask import Response
         return Response(status=404)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 def get_photos():
     """Get photos from cache - ALWAYS return cached data immediately"""
-    # ALWAYS return cached data first for instant loading
-    cached_photos = get_photos_from_db()
-    
+    global _photos_cache, _photos_json
+
+    # ALWAYS return cached data first for instant loading; fall back to
+    # the DB only when the in-memory copy hasn't been populated yet
+    with _photos_lock:
+        cached_photos = _photos_cache
+    if cached_photos is None:
+        cached_photos = get_photos_from_db()
+        if cached_photos:
+            with _photos_lock:
+                _photos_cache = cached_photos
+                _photos_json = orjson.dumps(cached_photos)
+
     if cached_photos and len(cached_photos) > 0:
-        print(f"✓ Returning {len(cached_photos)} cached photos")
-        
-        # Check in background if we need to refresh (non-blocking)
-        if should_refresh_cache():
-            print("⏰ Cache refresh needed - starting background refresh...")
-            refresh_cache_async()
-        
+        log.debug("Returning %d cached photos", len(cached_photos))
+        # The scheduler keeps the cache fresh, so requests never pay for
+        # a refresh check here
         return cached_photos
     else:
         # No cache exists - need to fetch for first time (blocking)
-        print("📥 No cache found, fetching from Google Drive (first run)...")
+        log.info("No cache found, fetching from Google Drive (first run)...")
         photos = fetch_photos_from_drive()
         if photos and len(photos) > 0:
             save_photos_to_db(photos)
-            print(f"✓ Initial cache created with {len(photos)} photos")
+            log.info("Initial cache created with %d photos", len(photos))
             return photos
         else:
-            print("✗ Failed to fetch photos from Drive")
+            log.error("Failed to fetch photos from Drive")
             return []
 
-def refresh_cache_async():
-    """Refresh the cache in a background thread without blocking the response"""
-    def refresh_worker():
-        print("🔄 Background refresh starting...")
+# Ensures only one Drive refresh runs at a time; overlapping triggers
+# (scheduler tick, startup refresh, manual /api/refresh) skip instead of
+# each firing their own Drive fetch
+_refresh_lock = threading.Lock()
+
+def refresh_cache_job():
+    """Fetch from Drive and update the cache - run periodically by the scheduler"""
+    if not _refresh_lock.acquire(blocking=False):
+        log.debug("Refresh already in progress, skipping")
+        return
+    try:
+        log.info("Scheduled refresh starting...")
         photos = fetch_photos_from_drive()
         if photos and len(photos) > 0:
             save_photos_to_db(photos)
-            print(f"✓ Background refresh complete: {len(photos)} photos in cache")
+            log.info("Scheduled refresh complete: %d photos in cache", len(photos))
         else:
-            print("⚠ Background refresh failed, keeping existing cache")
-    
-    # Start refresh in background thread
-    thread = threading.Thread(target=refresh_worker, daemon=True)
-    thread.start()
+            log.warning("Scheduled refresh failed, keeping existing cache")
+    finally:
+        _refresh_lock.release()
+
+def start_scheduler():
+    """Start the background scheduler that refreshes the cache periodically"""
+    scheduler = BackgroundScheduler(daemon=True)
+    scheduler.add_job(refresh_cache_job, 'interval', minutes=CACHE_DURATION_MINUTES)
+    scheduler.start()
+    # If the cache is already stale on startup, don't wait a full interval
+    if should_refresh_cache():
+        threading.Thread(target=refresh_cache_job, daemon=True).start()
+    return scheduler
 
 @app.route('/api/photos')
 def api_photos():
     """API endpoint to get list of photos"""
     photos = get_photos()
     
-    # Get cache info for countdown timer
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT last_updated FROM cache_info WHERE key = ?', ('photos',))
-    result = c.fetchone()
-    conn.close()
-    
+    # Get cache info for countdown timer - same in-memory timestamp the
+    # refresh check uses, so no extra DB round trip
+    last_updated = _last_refresh_time()
+
+    # The payload only changes at refresh time, so the refresh timestamp
+    # makes a perfect ETag: polls between refreshes become tiny 304s
+    etag = str(int(last_updated.timestamp())) if last_updated else None
+    if etag and etag in request.if_none_match:
+        # RFC 9110: a 304 carries the validator the 200 would have sent
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
     cache_info = {}
-    if result:
-        last_updated = datetime.fromisoformat(result[0])
-        next_refresh = last_updated + timedelta(minutes=CACHE_DURATION_MINUTES)
+    if last_updated:
+        with _refresh_state_lock:
+            next_refresh = _refresh_state['next_refresh']
         seconds_until_refresh = int((next_refresh - datetime.now()).total_seconds())
         cache_info = {
             'last_updated': last_updated.isoformat(),
@@ -351,53 +560,55 @@ def api_photos():
             'seconds_until_refresh': max(0, seconds_until_refresh)
         }
     
-    return jsonify({
-        'photos': photos, 
-        'count': len(photos),
-        'cache_info': cache_info
-    })
+    # The photo list bytes are serialized once per refresh; only the small
+    # cache_info block (the countdown changes per request) is encoded here
+    with _photos_lock:
+        photos_json = _photos_json
+    if photos_json is None:
+        photos_json = orjson.dumps(photos)
+
+    body = (b'{"photos":' + photos_json +
+            b',"count":' + str(len(photos)).encode() +
+            b',"cache_info":' + orjson.dumps(cache_info) + b'}')
+    response = app.response_class(body, mimetype='application/json')
+    if etag:
+        response.set_etag(etag)
+        response.cache_control.max_age = 30
+    return response
 
 @app.route('/api/debug/drive')
 def debug_drive():
     """Return the raw JSON that the Drive API gave us (or the error)"""
-    photos = fetch_photos_from_drive()
-    # Re-run the same query but capture the *raw* response dict
-    try:
-        service = build('drive', 'v3', developerKey=GOOGLE_API_KEY, cache_discovery=False)
-        results = service.files().list(
-            q=f"'{GOOGLE_DRIVE_FOLDER_ID}' in parents and mimeType contains 'image/'",
-            fields="nextPageToken, files(id, name, mimeType, thumbnailLink, webViewLink)",
-            pageSize=1000
-        ).execute()
-        return jsonify({
-            "raw_drive_response": results,
-            "photo_count": len(photos),
-            "cached_photos": get_photos_from_db()
-        })
-    except Exception as e:
-        import traceback, io, sys
-        buf = io.StringIO()
-        traceback.print_exc(file=buf)
-        return jsonify({
-            "error": str(e),
-            "traceback": buf.getvalue()
-        }), 500
+    # One fetch serves both the photo list and the raw first-page dict -
+    # no second paginated list against Drive
+    photos, raw = fetch_photos_from_drive(return_raw=True)
+    return jsonify({
+        "raw_drive_response": raw,
+        "photo_count": len(photos),
+        "cached_photos": get_photos_from_db()
+    })
 
 @app.route('/api/refresh')
 def api_refresh():
     """Force refresh photos from Google Drive (blocking for manual requests)"""
-    print("📥 Manual refresh requested...")
-    photos = fetch_photos_from_drive()
-    if photos and len(photos) > 0:
-        save_photos_to_db(photos)
-        return jsonify({'success': True, 'count': len(photos), 'message': 'Photos refreshed successfully'})
-    else:
-        # Return current cache even if refresh failed
-        cached = get_photos_from_db()
-        return jsonify({'success': False, 'count': len(cached), 'message': 'Failed to fetch from Drive, using cached photos'}), 200
+    log.info("Manual refresh requested...")
+    # Blocking acquire: this endpoint is intentionally synchronous, and
+    # holding the lock means a concurrent scheduler tick and a manual
+    # refresh still amount to one Drive fetch at a time
+    with _refresh_lock:
+        photos = fetch_photos_from_drive()
+        if photos and len(photos) > 0:
+            save_photos_to_db(photos)
+            return jsonify({'success': True, 'count': len(photos), 'message': 'Photos refreshed successfully'})
+
+    # Return current cache even if refresh failed
+    cached = get_photos_from_db()
+    return jsonify({'success': False, 'count': len(cached), 'message': 'Failed to fetch from Drive, using cached photos'}), 200
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     init_db()
-    print(f"Database initialized. Cache will refresh every {CACHE_DURATION_MINUTES} minutes.")
+    start_scheduler()
+    log.info("Database initialized. Cache will refresh every %d minutes.", CACHE_DURATION_MINUTES)
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,26 @@
+"""Gunicorn configuration for running the slideshow in production.
+
+Usage: gunicorn -c gunicorn_conf.py wsgi:app
+
+The threaded workers let image serving, API hits, and background
+refreshes overlap instead of serializing behind Werkzeug's dev server.
+SQLite runs in WAL mode, so multiple worker processes can read while one
+writes.
+"""
+
+bind = '0.0.0.0:5000'
+workers = 4
+threads = 16
+worker_class = 'gthread'
+
+
+def post_fork(server, worker):
+    """Initialize logging, the database and the per-worker refresh scheduler"""
+    import logging
+    # app.py only calls basicConfig under __main__; without a handler
+    # here every log.info from the workers would be silently dropped
+    logging.basicConfig(level=logging.INFO)
+
+    from app import init_db, start_scheduler
+    init_db()
+    start_scheduler()
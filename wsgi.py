@@ -0,0 +1,9 @@
+"""WSGI entry point for production servers.
+
+Usage: gunicorn -c gunicorn_conf.py wsgi:app
+
+Database setup and the refresh scheduler are handled per worker by the
+post_fork hook in gunicorn_conf.py.
+"""
+
+from app import app  # noqa: F401